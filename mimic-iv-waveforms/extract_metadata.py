@@ -10,21 +10,56 @@ Usage:
 
 Requirements:
     pip install wfdb pandas tqdm
+    pip install pyarrow  # optional, faster numerics parsing
+    pip install python-isal  # optional, faster gzip decompression
 """
 
 import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 import csv
-import gzip
+import itertools
+import logging
+import pickle
 import re
+import shutil
 
-import wfdb
+import numpy as np
 import pandas as pd
+import wfdb
 from tqdm import tqdm
 
+# pyarrow decodes gzipped CSV in C and hands Python small record
+# batches; fall back to the stdlib csv path when it is not installed
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+# ISA-L's igzip inflates several times faster than the stdlib gzip
+# module; fall back to stdlib when python-isal is not installed
+try:
+    from isal import igzip as gzip
+except ImportError:
+    import gzip
+
+# Compiled once: these run against every comment of every record
+_HADM_RE = re.compile(r'hadm_id\s+(\d+)', re.IGNORECASE)
+_HADM_LONG_RE = re.compile(r'hospital admission id[:\s]+(\d+)', re.IGNORECASE)
+_SUBJ_RE = re.compile(r'subject_id\s+(\d+)', re.IGNORECASE)
+
+_DT_FMT = '%Y-%m-%d %H:%M:%S'
+
+
+def _fmt(dt):
+    """Format a datetime for CSV output; non-datetimes become ''."""
+    return dt.strftime(_DT_FMT) if isinstance(dt, datetime) else (dt or '')
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -50,50 +85,99 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def _scan_p_dirs(root):
+    """Yield directory entries under root whose name starts with 'p'.
+
+    Uses os.scandir so is_dir() reads the cached dirent instead of
+    issuing an extra stat() per entry.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.name.startswith('p') and entry.is_dir(follow_symlinks=False):
+                yield entry
+
+
 def find_all_records(data_dir):
     """Find all waveform records in the data directory."""
-    data_path = Path(data_dir)
     records = []
 
     print(f"Scanning directory: {data_dir}")
 
-    for p_dir in sorted(data_path.glob('p*')):
-        if not p_dir.is_dir():
-            continue
+    for p_dir in _scan_p_dirs(data_dir):
+        for patient_dir in _scan_p_dirs(p_dir.path):
+            subject_id = int(patient_dir.name[1:])  # Remove 'p' prefix
 
-        for patient_dir in sorted(p_dir.glob('p*')):
-            if not patient_dir.is_dir():
-                continue
+            with os.scandir(patient_dir.path) as it:
+                for record_dir in it:
+                    if not record_dir.is_dir(follow_symlinks=False):
+                        continue
 
-            subject_id = patient_dir.name[1:]  # Remove 'p' prefix
+                    record_name = record_dir.name
+                    header_file = os.path.join(record_dir.path, record_name + '.hea')
 
-            for record_dir in sorted(patient_dir.iterdir()):
-                if not record_dir.is_dir():
-                    continue
+                    if os.path.exists(header_file):
+                        rel_path = os.path.join(p_dir.name, patient_dir.name, record_name)
+                        records.append((rel_path, record_name, subject_id))
 
-                record_name = record_dir.name
-                header_file = record_dir / f"{record_name}.hea"
-
-                if header_file.exists():
-                    rel_path = record_dir.relative_to(data_path)
-                    records.append((str(rel_path), record_name, int(subject_id)))
+    # Sort once at the end for deterministic output order
+    records.sort(key=lambda t: (t[0], t[1]))
 
     print(f"Found {len(records)} records")
     return records
 
 
+def _cached_find_all_records(data_dir):
+    """Memoize find_all_records to a pickle next to the data.
+
+    Re-walking the tree can take minutes on a network filesystem; the
+    cache is keyed on the data directory's mtime and shared with
+    update_records.py.
+    """
+    cache_file = Path(data_dir) / '.mimic_records_cache.pkl'
+    dir_mtime = os.stat(data_dir).st_mtime
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            if cached['mtime'] == dir_mtime:
+                print(f"Using cached record list: {cache_file}")
+                return cached['records']
+        except Exception:
+            pass  # unreadable or stale cache; fall through to a fresh scan
+
+    records = find_all_records(data_dir)
+
+    try:
+        with open(cache_file, 'wb') as f:
+            # Creating the cache file bumps the directory mtime, so take
+            # the timestamp once the file already exists
+            pickle.dump({'mtime': os.stat(data_dir).st_mtime, 'records': records}, f)
+    except OSError:
+        pass  # data dir may be read-only; the scan result is still usable
+
+    return records
+
+
+# Lookup tables for categorize_signal_type, built once: str.startswith
+# takes a tuple of prefixes and checks them in C, and the pressure
+# substring scan collapses to a single compiled alternation
+_ECG_LEADS = ('I', 'II', 'III', 'AVR', 'AVL', 'AVF', 'V', 'V1', 'V2', 'V3', 'V4', 'V5', 'V6',
+              'MCL', 'AI', 'AS', 'ES')
+_PRESSURE_TYPES = ('ABP', 'ART', 'AO', 'BAP', 'CVP', 'FAP', 'ICP', 'IC1', 'IC2',
+                   'LAP', 'PAP', 'RAP', 'UAP', 'UVP', 'P', 'P1', 'P2', 'P4')
+_ECG_EXACT = frozenset(_ECG_LEADS)
+_ECG_PREFIXES = tuple(sorted(_ECG_LEADS, key=len, reverse=True))
+_PRESSURE_RE = re.compile('|'.join(re.escape(p) for p in _PRESSURE_TYPES))
+
+
 def categorize_signal_type(signal_name):
     """Categorize signal by name."""
     signal_name_upper = signal_name.upper()
 
-    ecg_leads = ['I', 'II', 'III', 'AVR', 'AVL', 'AVF', 'V', 'V1', 'V2', 'V3', 'V4', 'V5', 'V6',
-                 'MCL', 'AI', 'AS', 'ES']
-    pressure_types = ['ABP', 'ART', 'AO', 'BAP', 'CVP', 'FAP', 'ICP', 'IC1', 'IC2',
-                      'LAP', 'PAP', 'RAP', 'UAP', 'UVP', 'P', 'P1', 'P2', 'P4']
-
-    if any(signal_name_upper == lead or signal_name_upper.startswith(lead) for lead in ecg_leads):
+    if signal_name_upper in _ECG_EXACT or signal_name_upper.startswith(_ECG_PREFIXES):
         return 'ECG'
-    elif any(pressure in signal_name_upper for pressure in pressure_types):
+    elif _PRESSURE_RE.search(signal_name_upper):
         return 'Pressure'
     elif 'PLETH' in signal_name_upper:
         return 'Plethysmogram'
@@ -105,16 +189,413 @@ def categorize_signal_type(signal_name):
         return 'Other'
 
 
+def _categorize_signal_types(names):
+    """Categorize all of a segment's signal names at once.
+
+    Vectorized counterpart of categorize_signal_type: one pass of numpy
+    masks over the segment's names instead of a Python call per signal.
+    Match order is identical to the scalar function.
+    """
+    names_u = np.char.upper(np.asarray(names, dtype=str))
+    types = np.full(len(names), 'Other', dtype=object)
+
+    assigned = np.isin(names_u, _ECG_LEADS) | np.array(
+        [s.startswith(_ECG_PREFIXES) for s in names_u], dtype=bool)
+    types[assigned] = 'ECG'
+
+    for mask, label in (
+            (np.array([bool(_PRESSURE_RE.search(s)) for s in names_u], dtype=bool), 'Pressure'),
+            (np.char.find(names_u, 'PLETH') >= 0, 'Plethysmogram'),
+            (np.char.find(names_u, 'RESP') >= 0, 'Respiration'),
+            (np.char.find(names_u, 'CO2') >= 0, 'Capnography')):
+        mask &= ~assigned
+        types[mask] = label
+        assigned |= mask
+
+    return types.tolist()
+
+
+# Sentinel output index for columns routed to the generic measurement fields
+_GENERIC = -1
+
+
+def _as_int(value):
+    """Convert a CSV numeric string to int, accepting '98.0'-style floats."""
+    return int(float(value))
+
+
+def _build_numerics_actions(header):
+    """Pre-classify numerics columns into output-row actions.
+
+    Returns a list parallel to header where each entry is None (column
+    ignored), (_GENERIC, column_name) for the generic measurement
+    fields, or (output_index, converter) into the numerics row layout.
+    This hoists the per-column substring matching out of the per-row
+    loop, so it runs once per file instead of once per value.
+    """
+    actions = [None]  # index 0 is the counter-ticks column
+
+    for col_name in header[1:]:
+        col = col_name.lower()
+
+        if 'spo2' in col or 'sp02' in col:
+            actions.append((5, _as_int))
+        elif 'hr' in col and 'heart' in col:
+            actions.append((3, _as_int))
+        elif 'rr' in col and 'resp' in col:
+            actions.append((4, _as_int))
+        elif 'nibp' in col:
+            if 'sys' in col:
+                actions.append((6, _as_int))
+            elif 'dias' in col:
+                actions.append((7, _as_int))
+            elif 'mean' in col:
+                actions.append((8, _as_int))
+            else:
+                actions.append(None)
+        elif 'abp' in col:
+            if 'sys' in col:
+                actions.append((9, _as_int))
+            elif 'dias' in col:
+                actions.append((10, _as_int))
+            elif 'mean' in col:
+                actions.append((11, _as_int))
+            else:
+                actions.append(None)
+        elif 'cvp' in col:
+            actions.append((12, float))
+        elif 'etco2' in col:
+            actions.append((13, float))
+        elif 'temp' in col:
+            actions.append((14, float))
+        else:
+            actions.append((_GENERIC, col_name))
+
+    return actions
+
+
+def _parse_numerics_csv(numerics_file, writer, record_name, base_datetime, base_freq):
+    """Parse a numerics CSV with the stdlib csv reader.
+
+    Fallback path used when pyarrow is not installed. Writes
+    waveform_numerics.csv rows to the given csv writer as it goes, so
+    the file never has to fit in memory at once.
+    """
+    with gzip.open(numerics_file, 'rt', newline='') as gz:
+        reader = csv.reader(gz)
+        header = next(reader)
+        actions = _build_numerics_actions(header)
+        n_cols = len(header)
+        _td = timedelta  # local bind for the hot loop
+
+        for row in reader:
+            counter_ticks = int(row[0])
+
+            # Calculate timestamp
+            measurement_time = ''
+            if isinstance(base_datetime, datetime) and base_freq and base_freq > 0:
+                try:
+                    measurement_time = (base_datetime + _td(seconds=counter_ticks / base_freq)).strftime(_DT_FMT)
+                except:
+                    pass
+
+            # Preallocated row in waveform_numerics.csv column order
+            out = [record_name, measurement_time, counter_ticks,
+                   '', '', '', '', '', '', '', '', '', '', '', '', '', '', '']
+
+            for idx in range(1, n_cols):
+                action = actions[idx]
+                if action is None or not row[idx]:
+                    continue
+
+                out_idx, conv = action
+                # Non-numeric text raises here and aborts the file with
+                # a warning, matching the pyarrow path and the baseline
+                value = float(row[idx])
+                if value != value:
+                    continue  # literal NaN cell, skipped like pd.isna
+
+                if out_idx == _GENERIC:
+                    # Generic fields take the first unmatched column only
+                    if not out[15]:
+                        out[15] = conv
+                        out[16] = value
+                else:
+                    out[out_idx] = int(value) if conv is _as_int else value
+
+            writer.writerow(out)
+
+
+def _convert_numerics_batch(batch, actions, record_name, base_datetime, base_freq):
+    """Convert one pyarrow record batch into waveform_numerics.csv rows."""
+    n_rows = batch.num_rows
+    ticks = batch.column(0).to_numpy(zero_copy_only=False).astype('int64')
+
+    if isinstance(base_datetime, datetime) and base_freq and base_freq > 0:
+        # Timestamp synthesis runs as numpy int64 arithmetic; only the
+        # final formatted strings are materialized
+        times = (pd.Timestamp(base_datetime)
+                 + pd.to_timedelta(ticks / base_freq, unit='s')).strftime(_DT_FMT).tolist()
+    else:
+        times = [''] * n_rows
+
+    # One list per waveform_numerics.csv column
+    cols = [[record_name] * n_rows, times, ticks.tolist()]
+    cols += [[''] * n_rows for _ in range(15)]
+
+    generics = []
+    for idx in range(1, batch.num_columns):
+        action = actions[idx]
+        if action is None:
+            continue
+
+        out_idx, conv = action
+        arr = batch.column(idx).to_numpy(zero_copy_only=False)
+
+        if arr.dtype == object:
+            # Mixed/string column: arrow gives None for nulls
+            valid = np.array([v is not None for v in arr], dtype=bool)
+        elif np.issubdtype(arr.dtype, np.floating):
+            valid = ~np.isnan(arr)
+        else:
+            valid = np.ones(n_rows, dtype=bool)
+
+        if out_idx == _GENERIC:
+            # conv holds the original column name for generic actions
+            generics.append((conv, arr, valid))
+            continue
+
+        if arr.dtype == object:
+            cols[out_idx] = [conv(v) if ok else ''
+                             for v, ok in zip(arr.tolist(), valid)]
+        elif conv is _as_int:
+            cast = np.where(valid, arr, 0).astype('int64').tolist()
+            cols[out_idx] = [v if ok else '' for v, ok in zip(cast, valid)]
+        else:
+            cast = arr.astype('float64').tolist()
+            cols[out_idx] = [v if ok else '' for v, ok in zip(cast, valid)]
+
+    # Generic fields take the first unmatched column with a value per row
+    if generics:
+        name_col = cols[15]
+        val_col = cols[16]
+        for col_name, arr, valid in generics:
+            for i in np.flatnonzero(valid):
+                if name_col[i] == '':
+                    name_col[i] = col_name
+                    val_col[i] = float(arr[i])
+
+    return list(zip(*cols))
+
+
+def _parse_numerics_arrow(numerics_file, writer, record_name, base_datetime, base_freq):
+    """Parse a numerics CSV with pyarrow's streaming reader.
+
+    Decompression and CSV decoding run in C, and Python only sees
+    block-sized record batches whose columns convert to numpy arrays.
+    Each batch is written to the given csv writer as soon as it is
+    converted, so memory stays bounded by the block size.
+    """
+    actions = None
+
+    # Small files decode in a single block to skip per-batch overhead;
+    # large ones stream in 1 MiB blocks so peak decode memory stays
+    # bounded regardless of file size
+    if os.path.getsize(numerics_file) < 50_000_000:
+        block_size = 1 << 26
+    else:
+        block_size = 1 << 20
+
+    with pacsv.open_csv(
+            pa.input_stream(numerics_file, compression='gzip'),
+            read_options=pacsv.ReadOptions(block_size=block_size)) as reader:
+        for batch in reader:
+            if actions is None:
+                actions = _build_numerics_actions(batch.schema.names)
+            writer.writerows(_convert_numerics_batch(
+                batch, actions, record_name, base_datetime, base_freq))
+
+
+def _process_record(args):
+    """Process a single record into CSV rows.
+
+    Runs in a worker process: parses the record header, segment headers
+    and numerics file, and returns (records_rows, segments_rows,
+    signals_rows, numerics_part, warnings) so that writing the shared
+    CSVs and logging stays in the parent process. Numerics rows are
+    spilled to a part file in the output directory as they are parsed —
+    they can run to millions of rows per record, so they are never held
+    in memory or pickled back — and numerics_part is its path (or None).
+    """
+    data_dir, record_path, record_name, subject_id, skip_numerics, output_dir = args
+
+    records_rows = []
+    segments_rows = []
+    signals_rows = []
+    numerics_part = None
+    warnings = []
+
+    try:
+        # Plain string paths: os.path.join avoids a PurePath allocation
+        # per record and per segment
+        full_path = os.path.join(data_dir, record_path)
+        record_file = os.path.join(full_path, record_name)
+
+        # Read multi-segment header
+        record = wfdb.rdheader(record_file)
+
+        # Snapshot the attributes once: dict.get skips the descriptor
+        # protocol that hasattr/getattr pay on every access
+        r = record.__dict__
+
+        # Extract hadm_id and subject_id from comments
+        hadm_id = ''
+        subject_id_from_header = None
+        for comment in (r.get('comments') or []):
+            # Try different patterns for hadm_id
+            match = _HADM_RE.search(comment) or _HADM_LONG_RE.search(comment)
+            if match:
+                hadm_id = match.group(1)
+
+            # Also extract subject_id from header if available
+            match = _SUBJ_RE.search(comment)
+            if match:
+                subject_id_from_header = int(match.group(1))
+
+        # Use subject_id from header if available, otherwise use from directory
+        if subject_id_from_header:
+            subject_id = subject_id_from_header
+
+        # base_datetime is a property derived from base_date/base_time,
+        # so it never appears in __dict__ and needs a real getattr
+        base_dt = getattr(record, 'base_datetime', None)
+
+        # Record metadata
+        start_datetime = base_dt or ''
+        duration_sec = r.get('sig_len') or ''
+        base_freq = r.get('fs') or ''
+        seg_names = r.get('seg_name')
+        num_segments = len(seg_names) if seg_names else 0
+
+        # Calculate end datetime
+        end_datetime = ''
+        if start_datetime and duration_sec and base_freq:
+            try:
+                end_datetime = _fmt(start_datetime + timedelta(seconds=duration_sec / base_freq))
+            except:
+                pass
+
+        # Format start_datetime
+        start_datetime = _fmt(start_datetime)
+
+        records_rows.append([
+            record_name, subject_id, hadm_id, start_datetime, end_datetime,
+            duration_sec, record_path, f"{record_name}.hea", base_freq, num_segments
+        ])
+
+        # Process segments
+        if seg_names:
+            # Hoist per-record values and prefix-sum seg_len once, so each
+            # segment's sample offset is an O(1) lookup instead of summing
+            # a slice (O(N^2) over all segments of a record)
+            _fs = r.get('fs') or 0
+            _base = base_dt
+            seg_len = r.get('seg_len')
+            seg_len_cum = list(itertools.accumulate(seg_len)) if seg_len else None
+
+            for seg_num, seg_name in enumerate(seg_names):
+                # Skip layout and empty segments; the name check has to
+                # run for every segment, since '_0000' segments follow
+                # the layout entry in mimic4wdb master headers
+                if seg_name == '~' or '_layout' in seg_name or seg_name.endswith('_0000'):
+                    continue
+
+                try:
+                    seg_file = os.path.join(full_path, seg_name)
+                    seg_header = wfdb.rdheader(seg_file)
+
+                    # Calculate segment start time
+                    seg_start_time = ''
+                    if start_datetime and _fs and _fs > 0:
+                        if seg_num > 0 and seg_len_cum is not None:
+                            try:
+                                offset_seconds = seg_len_cum[seg_num - 1] / _fs
+                                if isinstance(_base, datetime):
+                                    seg_start_time = _fmt(_base + timedelta(seconds=offset_seconds))
+                            except:
+                                pass
+
+                    seg_duration = ''
+                    if seg_header.sig_len and seg_header.fs and seg_header.fs > 0:
+                        seg_duration = seg_header.sig_len / seg_header.fs
+
+                    sh = seg_header.__dict__
+                    segments_rows.append([
+                        record_name, seg_name, seg_num, seg_start_time, seg_duration,
+                        f"{seg_name}.hea", f"{seg_name}.dat" if 'file_name' in sh else '',
+                        seg_header.fs, seg_header.n_sig
+                    ])
+
+                    # Process signals in segment: classify the whole
+                    # name list at once and zip the columns into rows
+                    sig_names = sh.get('sig_name') or []
+                    units = sh.get('units')
+                    gains = sh.get('adc_gain')
+                    baselines = sh.get('baseline')
+                    adc_res = sh.get('adc_res')
+                    sig_types = _categorize_signal_types(sig_names)
+
+                    _rep = itertools.repeat
+                    signals_rows.extend(zip(
+                        _rep(record_name), _rep(seg_num), sig_names,
+                        range(len(sig_names)),
+                        units or _rep(''), gains or _rep(''),
+                        baselines or _rep(''), adc_res or _rep(''),
+                        _rep(''), sig_types
+                    ))
+
+                except Exception as e:
+                    warnings.append(f"Could not parse segment {seg_name}: {e}")
+                    continue
+
+        # Process numerics if not skipped
+        if not skip_numerics:
+            numerics_file = os.path.join(full_path, f"{record_name}n.csv.gz")
+            if os.path.isfile(numerics_file):
+                part_path = os.path.join(output_dir, f".{record_name}n.part")
+                try:
+                    with open(part_path, 'w', newline='', buffering=1 << 20) as part:
+                        writer = csv.writer(part)
+                        if pacsv is not None:
+                            _parse_numerics_arrow(numerics_file, writer, record_name, base_dt, base_freq)
+                        else:
+                            _parse_numerics_csv(numerics_file, writer, record_name, base_dt, base_freq)
+                    numerics_part = part_path
+
+                except Exception as e:
+                    warnings.append(f"Could not parse numerics for {record_name}: {e}")
+                    try:
+                        os.remove(part_path)  # drop the partial spill file
+                    except OSError:
+                        pass
+
+    except Exception as e:
+        warnings.append(f"Error processing {record_name}: {e}")
+
+    return records_rows, segments_rows, signals_rows, numerics_part, warnings
+
+
 def extract_metadata(data_dir, records, output_dir, skip_numerics=False):
     """Extract metadata from all records and write to CSV files."""
 
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
 
-    # Open CSV files for writing
-    records_csv = open(output_path / 'waveform_records.csv', 'w', newline='')
-    segments_csv = open(output_path / 'waveform_segments.csv', 'w', newline='')
-    signals_csv = open(output_path / 'waveform_signals.csv', 'w', newline='')
+    # Open CSV files for writing with a 1 MiB buffer so the multi-GB
+    # outputs go to disk in large writes instead of 8 KiB flushes
+    records_csv = open(output_path / 'waveform_records.csv', 'w', newline='', buffering=1 << 20)
+    segments_csv = open(output_path / 'waveform_segments.csv', 'w', newline='', buffering=1 << 20)
+    signals_csv = open(output_path / 'waveform_signals.csv', 'w', newline='', buffering=1 << 20)
 
     records_writer = csv.writer(records_csv)
     segments_writer = csv.writer(segments_csv)
@@ -140,7 +621,7 @@ def extract_metadata(data_dir, records, output_dir, skip_numerics=False):
 
     # Process numerics separately if needed
     if not skip_numerics:
-        numerics_csv = open(output_path / 'waveform_numerics.csv', 'w', newline='')
+        numerics_csv = open(output_path / 'waveform_numerics.csv', 'w', newline='', buffering=1 << 20)
         numerics_writer = csv.writer(numerics_csv)
         numerics_writer.writerow([
             'record_id', 'measurement_time', 'counter_ticks', 'heart_rate', 'resp_rate',
@@ -151,195 +632,32 @@ def extract_metadata(data_dir, records, output_dir, skip_numerics=False):
 
     print("\nExtracting metadata from records...")
 
-    for record_path, record_name, subject_id in tqdm(records, desc="Processing"):
-        try:
-            full_path = Path(data_dir) / record_path
-            record_file = full_path / record_name
-
-            # Read multi-segment header
-            record = wfdb.rdheader(str(record_file))
-
-            # Extract hadm_id and subject_id from comments
-            hadm_id = ''
-            subject_id_from_header = None
-            if hasattr(record, 'comments'):
-                for comment in record.comments:
-                    # Try different patterns for hadm_id
-                    if 'hadm_id' in comment.lower():
-                        match = re.search(r'hadm_id\s+(\d+)', comment, re.IGNORECASE)
-                        if match:
-                            hadm_id = match.group(1)
-                    elif 'hospital admission id' in comment.lower():
-                        match = re.search(r'hospital admission id[:\s]+(\d+)', comment, re.IGNORECASE)
-                        if match:
-                            hadm_id = match.group(1)
-
-                    # Also extract subject_id from header if available
-                    if 'subject_id' in comment.lower():
-                        match = re.search(r'subject_id\s+(\d+)', comment, re.IGNORECASE)
-                        if match:
-                            subject_id_from_header = int(match.group(1))
-
-            # Use subject_id from header if available, otherwise use from directory
-            if subject_id_from_header:
-                subject_id = subject_id_from_header
-
-            # Record metadata
-            start_datetime = record.base_datetime if hasattr(record, 'base_datetime') else ''
-            duration_sec = record.sig_len if hasattr(record, 'sig_len') else ''
-            base_freq = record.fs if hasattr(record, 'fs') else ''
-            num_segments = len(record.seg_name) if hasattr(record, 'seg_name') else 0
-
-            # Calculate end datetime
-            end_datetime = ''
-            if start_datetime and duration_sec and base_freq:
-                try:
-                    end_dt = start_datetime + timedelta(seconds=duration_sec / base_freq)
-                    end_datetime = end_dt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(end_dt, datetime) else end_dt
-                except:
-                    pass
-
-            # Format start_datetime
-            if isinstance(start_datetime, datetime):
-                start_datetime = start_datetime.strftime('%Y-%m-%d %H:%M:%S')
-
-            records_writer.writerow([
-                record_name, subject_id, hadm_id, start_datetime, end_datetime,
-                duration_sec, record_path, f"{record_name}.hea", base_freq, num_segments
-            ])
-
-            # Process segments
-            if hasattr(record, 'seg_name'):
-                for seg_num, seg_name in enumerate(record.seg_name):
-                    # Skip layout segments
-                    if seg_name == '~' or '_layout' in seg_name or seg_name.endswith('_0000'):
-                        continue
-
-                    try:
-                        seg_file = full_path / seg_name
-                        seg_header = wfdb.rdheader(str(seg_file))
-
-                        # Calculate segment start time
-                        seg_start_time = ''
-                        if start_datetime and hasattr(record, 'fs') and record.fs > 0:
-                            if seg_num > 0 and hasattr(record, 'seg_len'):
-                                try:
-                                    offset_samples = sum(record.seg_len[:seg_num])
-                                    offset_seconds = offset_samples / record.fs
-                                    if isinstance(record.base_datetime, datetime):
-                                        seg_start = record.base_datetime + timedelta(seconds=offset_seconds)
-                                        seg_start_time = seg_start.strftime('%Y-%m-%d %H:%M:%S')
-                                except:
-                                    pass
-
-                        seg_duration = ''
-                        if seg_header.sig_len and seg_header.fs and seg_header.fs > 0:
-                            seg_duration = seg_header.sig_len / seg_header.fs
-
-                        segments_writer.writerow([
-                            record_name, seg_name, seg_num, seg_start_time, seg_duration,
-                            f"{seg_name}.hea", f"{seg_name}.dat" if hasattr(seg_header, 'file_name') else '',
-                            seg_header.fs, seg_header.n_sig
-                        ])
-
-                        # Process signals in segment
-                        for sig_idx in range(seg_header.n_sig):
-                            sig_name = seg_header.sig_name[sig_idx]
-                            sig_units = seg_header.units[sig_idx] if hasattr(seg_header, 'units') else ''
-                            sig_gain = seg_header.adc_gain[sig_idx] if hasattr(seg_header, 'adc_gain') else ''
-                            sig_baseline = seg_header.baseline[sig_idx] if hasattr(seg_header, 'baseline') else ''
-                            sig_adc_res = seg_header.adc_res[sig_idx] if hasattr(seg_header, 'adc_res') else ''
-                            sig_type = categorize_signal_type(sig_name)
-
-                            signals_writer.writerow([
-                                record_name, seg_num, sig_name, sig_idx, sig_units,
-                                sig_gain, sig_baseline, sig_adc_res, '', sig_type
-                            ])
-
-                    except Exception as e:
-                        print(f"\n  Warning: Could not parse segment {seg_name}: {e}")
-                        continue
-
-            # Process numerics if not skipped
-            if not skip_numerics:
-                numerics_file = full_path / f"{record_name}n.csv.gz"
-                if numerics_file.exists():
-                    try:
-                        df = pd.read_csv(numerics_file, compression='gzip')
-                        time_col = df.columns[0]
-
-                        for _, row in df.iterrows():
-                            counter_ticks = int(row[time_col])
-
-                            # Calculate timestamp
-                            measurement_time = ''
-                            if isinstance(record.base_datetime, datetime) and base_freq and base_freq > 0:
-                                try:
-                                    offset_seconds = counter_ticks / base_freq
-                                    meas_time = record.base_datetime + timedelta(seconds=offset_seconds)
-                                    measurement_time = meas_time.strftime('%Y-%m-%d %H:%M:%S')
-                                except:
-                                    pass
-
-                            # Initialize all fields as empty
-                            hr = rr = spo2 = ''
-                            nibp_sys = nibp_dias = nibp_mean = ''
-                            abp_sys = abp_dias = abp_mean = ''
-                            cvp = etco2 = temp = ''
-                            meas_name = meas_val = meas_unit = ''
-
-                            # Extract measurements
-                            for col in df.columns[1:]:
-                                value = row[col]
-                                if pd.isna(value):
-                                    continue
-
-                                col_lower = col.lower()
-
-                                if 'spo2' in col_lower or 'sp02' in col_lower:
-                                    spo2 = int(value)
-                                elif 'hr' in col_lower and 'heart' in col_lower:
-                                    hr = int(value)
-                                elif 'rr' in col_lower and 'resp' in col_lower:
-                                    rr = int(value)
-                                elif 'nibp' in col_lower:
-                                    if 'sys' in col_lower:
-                                        nibp_sys = int(value)
-                                    elif 'dias' in col_lower:
-                                        nibp_dias = int(value)
-                                    elif 'mean' in col_lower:
-                                        nibp_mean = int(value)
-                                elif 'abp' in col_lower:
-                                    if 'sys' in col_lower:
-                                        abp_sys = int(value)
-                                    elif 'dias' in col_lower:
-                                        abp_dias = int(value)
-                                    elif 'mean' in col_lower:
-                                        abp_mean = int(value)
-                                elif 'cvp' in col_lower:
-                                    cvp = float(value)
-                                elif 'etco2' in col_lower:
-                                    etco2 = float(value)
-                                elif 'temp' in col_lower:
-                                    temp = float(value)
-                                else:
-                                    # Store in generic fields (only first unmatched column)
-                                    if not meas_name:
-                                        meas_name = col
-                                        meas_val = float(value)
-
-                            numerics_writer.writerow([
-                                record_name, measurement_time, counter_ticks, hr, rr, spo2,
-                                nibp_sys, nibp_dias, nibp_mean, abp_sys, abp_dias, abp_mean,
-                                cvp, etco2, temp, meas_name, meas_val, meas_unit
-                            ])
-
-                    except Exception as e:
-                        print(f"\n  Warning: Could not parse numerics for {record_name}: {e}")
-
-        except Exception as e:
-            print(f"\n  Error processing {record_name}: {e}")
-            continue
+    # Records are independent, so parse them in parallel and keep all
+    # CSV writing in this process. chunksize amortizes the IPC overhead
+    # of shipping results back.
+    tasks = [(data_dir, record_path, record_name, subject_id, skip_numerics, str(output_path))
+             for record_path, record_name, subject_id in records]
+
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for result in tqdm(executor.map(_process_record, tasks, chunksize=16),
+                           total=len(records), desc="Processing",
+                           mininterval=0.5, smoothing=0.1):
+            records_rows, segments_rows, signals_rows, numerics_part, warnings = result
+            records_writer.writerows(records_rows)
+            segments_writer.writerows(segments_rows)
+            signals_writer.writerows(signals_rows)
+
+            # Workers spill numerics rows to per-record part files;
+            # splice each one into the shared CSV and drop it
+            if numerics_part is not None:
+                with open(numerics_part, 'r', newline='') as part:
+                    shutil.copyfileobj(part, numerics_csv, 1 << 20)
+                os.remove(numerics_part)
+
+            # Workers stay silent; their warnings are logged here so
+            # progress output is not interleaved across processes
+            for message in warnings:
+                logging.warning(message)
 
     # Close all files
     records_csv.close()
@@ -360,13 +678,15 @@ def main():
     """Main execution function."""
     args = parse_arguments()
 
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     # Verify data directory exists
     if not os.path.isdir(args.data_dir):
         print(f"Error: Data directory not found: {args.data_dir}")
         sys.exit(1)
 
     # Find all records
-    records = find_all_records(args.data_dir)
+    records = _cached_find_all_records(args.data_dir)
 
     if not records:
         print("Error: No records found in the data directory")
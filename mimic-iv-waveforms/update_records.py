@@ -9,19 +9,33 @@ Usage:
     python update_records.py --data-dir /path/to/mimic4wdb/0.1.0/waves --output-file /path/to/waveform_records.csv
 
 Requirements:
-    pip install wfdb pandas tqdm
+    pip install tqdm
 """
 
 import argparse
+import os
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 import csv
+import logging
+import pickle
 import re
 
-import wfdb
 from tqdm import tqdm
 
+# Compiled once: these run against every comment of every record
+_HADM_RE = re.compile(r'hadm_id\s+(\d+)', re.IGNORECASE)
+_HADM_LONG_RE = re.compile(r'hospital admission id[:\s]+(\d+)', re.IGNORECASE)
+_SUBJ_RE = re.compile(r'subject_id\s+(\d+)', re.IGNORECASE)
+
+_DT_FMT = '%Y-%m-%d %H:%M:%S'
+
+
+def _fmt(dt):
+    """Format a datetime for CSV output; non-datetimes become ''."""
+    return dt.strftime(_DT_FMT) if isinstance(dt, datetime) else (dt or '')
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -42,38 +56,133 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def _scan_p_dirs(root):
+    """Yield directory entries under root whose name starts with 'p'.
+
+    Uses os.scandir so is_dir() reads the cached dirent instead of
+    issuing an extra stat() per entry.
+    """
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.name.startswith('p') and entry.is_dir(follow_symlinks=False):
+                yield entry
+
+
 def find_all_records(data_dir):
     """Find all waveform records in the data directory."""
-    data_path = Path(data_dir)
     records = []
 
     print(f"Scanning directory: {data_dir}")
 
-    for p_dir in sorted(data_path.glob('p*')):
-        if not p_dir.is_dir():
-            continue
-
-        for patient_dir in sorted(p_dir.glob('p*')):
-            if not patient_dir.is_dir():
-                continue
+    for p_dir in _scan_p_dirs(data_dir):
+        for patient_dir in _scan_p_dirs(p_dir.path):
+            subject_id = int(patient_dir.name[1:])  # Remove 'p' prefix
 
-            subject_id = patient_dir.name[1:]  # Remove 'p' prefix
+            with os.scandir(patient_dir.path) as it:
+                for record_dir in it:
+                    if not record_dir.is_dir(follow_symlinks=False):
+                        continue
 
-            for record_dir in sorted(patient_dir.iterdir()):
-                if not record_dir.is_dir():
-                    continue
+                    record_name = record_dir.name
+                    header_file = os.path.join(record_dir.path, record_name + '.hea')
 
-                record_name = record_dir.name
-                header_file = record_dir / f"{record_name}.hea"
+                    if os.path.exists(header_file):
+                        rel_path = os.path.join(p_dir.name, patient_dir.name, record_name)
+                        records.append((rel_path, record_name, subject_id))
 
-                if header_file.exists():
-                    rel_path = record_dir.relative_to(data_path)
-                    records.append((str(rel_path), record_name, int(subject_id)))
+    # Sort once at the end for deterministic output order
+    records.sort(key=lambda t: (t[0], t[1]))
 
     print(f"Found {len(records)} records")
     return records
 
 
+def _cached_find_all_records(data_dir):
+    """Memoize find_all_records to a pickle next to the data.
+
+    Re-walking the tree can take minutes on a network filesystem; the
+    cache is keyed on the data directory's mtime and shared with
+    extract_metadata.py.
+    """
+    cache_file = Path(data_dir) / '.mimic_records_cache.pkl'
+    dir_mtime = os.stat(data_dir).st_mtime
+
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                cached = pickle.load(f)
+            if cached['mtime'] == dir_mtime:
+                print(f"Using cached record list: {cache_file}")
+                return cached['records']
+        except Exception:
+            pass  # unreadable or stale cache; fall through to a fresh scan
+
+    records = find_all_records(data_dir)
+
+    try:
+        with open(cache_file, 'wb') as f:
+            # Creating the cache file bumps the directory mtime, so take
+            # the timestamp once the file already exists
+            pickle.dump({'mtime': os.stat(data_dir).st_mtime, 'records': records}, f)
+    except OSError:
+        pass  # data dir may be read-only; the scan result is still usable
+
+    return records
+
+
+def _parse_hea_minimal(path):
+    """Parse only the header fields this script needs from a .hea file.
+
+    wfdb.rdheader builds a full Record object with per-signal metadata,
+    but updating waveform_records.csv only requires the record line and
+    the comments. Scans the file once and returns a dict with 'fs',
+    'sig_len', 'base_datetime', 'num_segments' and 'comments'.
+    """
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    comments = [line[1:].strip() for line in lines if line.startswith('#')]
+    body = [line for line in lines if not line.startswith('#')]
+
+    # Record line: name[/nseg] n_sig [fs [sig_len [base_time [base_date]]]]
+    fields = body[0].split()
+
+    fs = None
+    if len(fields) > 2:
+        # fs may carry a counter frequency suffix, e.g. '62.47/8000(0)';
+        # wfdb reports whole-number frequencies as int
+        fs = float(fields[2].split('/')[0])
+        if fs.is_integer():
+            fs = int(fs)
+
+    sig_len = int(fields[3]) if len(fields) > 3 else None
+
+    base_datetime = None
+    if len(fields) > 5:
+        # Mirror wfdb_strptime: the time form depends on the colon
+        # count (SS, MM:SS or HH:MM:SS), optionally with fractions
+        try:
+            time_fmt = ('%S', '%M:%S', '%H:%M:%S')[fields[4].count(':')]
+            if '.' in fields[4]:
+                time_fmt += '.%f'
+            base_datetime = datetime.strptime(f"{fields[5]} {fields[4]}", f"%d/%m/%Y {time_fmt}")
+        except (ValueError, IndexError):
+            pass
+
+    # In a multi-segment header ('/nseg' in the record name) the
+    # remaining non-comment lines are one segment each; in a
+    # single-segment header they are signal lines instead
+    num_segments = len(body) - 1 if '/' in fields[0] else 0
+
+    return {
+        'fs': fs,
+        'sig_len': sig_len,
+        'base_datetime': base_datetime,
+        'num_segments': num_segments,
+        'comments': comments,
+    }
+
+
 def extract_records_metadata(data_dir, records, output_file):
     """Extract metadata from record headers and write to CSV."""
 
@@ -88,58 +197,51 @@ def extract_records_metadata(data_dir, records, output_file):
             'record_duration_sec', 'file_path', 'header_file', 'base_counter_freq', 'num_segments'
         ])
 
-        for record_path, record_name, subject_id in tqdm(records, desc="Processing"):
+        for record_path, record_name, subject_id in tqdm(records, desc="Processing",
+                                                          mininterval=0.5, smoothing=0.1):
             try:
-                full_path = Path(data_dir) / record_path
-                record_file = full_path / record_name
+                # Plain string paths: os.path.join avoids a PurePath
+                # allocation per record
+                record_file = os.path.join(data_dir, record_path, record_name)
 
                 # Read multi-segment header
-                record = wfdb.rdheader(str(record_file))
+                hdr = _parse_hea_minimal(f"{record_file}.hea")
 
                 # Extract hadm_id and subject_id from comments
                 hadm_id = ''
                 subject_id_from_header = None
 
-                if hasattr(record, 'comments'):
-                    for comment in record.comments:
-                        # Try different patterns for hadm_id
-                        if 'hadm_id' in comment.lower():
-                            match = re.search(r'hadm_id\s+(\d+)', comment, re.IGNORECASE)
-                            if match:
-                                hadm_id = match.group(1)
-                        elif 'hospital admission id' in comment.lower():
-                            match = re.search(r'hospital admission id[:\s]+(\d+)', comment, re.IGNORECASE)
-                            if match:
-                                hadm_id = match.group(1)
-
-                        # Also extract subject_id from header if available
-                        if 'subject_id' in comment.lower():
-                            match = re.search(r'subject_id\s+(\d+)', comment, re.IGNORECASE)
-                            if match:
-                                subject_id_from_header = int(match.group(1))
+                for comment in hdr['comments']:
+                    # Try different patterns for hadm_id
+                    match = _HADM_RE.search(comment) or _HADM_LONG_RE.search(comment)
+                    if match:
+                        hadm_id = match.group(1)
+
+                    # Also extract subject_id from header if available
+                    match = _SUBJ_RE.search(comment)
+                    if match:
+                        subject_id_from_header = int(match.group(1))
 
                 # Use subject_id from header if available, otherwise use from directory
                 if subject_id_from_header:
                     subject_id = subject_id_from_header
 
                 # Record metadata
-                start_datetime = record.base_datetime if hasattr(record, 'base_datetime') else ''
-                duration_sec = record.sig_len if hasattr(record, 'sig_len') else ''
-                base_freq = record.fs if hasattr(record, 'fs') else ''
-                num_segments = len(record.seg_name) if hasattr(record, 'seg_name') else 0
+                start_datetime = hdr['base_datetime'] or ''
+                duration_sec = hdr['sig_len'] or ''
+                base_freq = hdr['fs'] or ''
+                num_segments = hdr['num_segments']
 
                 # Calculate end datetime
                 end_datetime = ''
                 if start_datetime and duration_sec and base_freq:
                     try:
-                        end_dt = start_datetime + timedelta(seconds=duration_sec / base_freq)
-                        end_datetime = end_dt.strftime('%Y-%m-%d %H:%M:%S') if isinstance(end_dt, datetime) else end_dt
+                        end_datetime = _fmt(start_datetime + timedelta(seconds=duration_sec / base_freq))
                     except:
                         pass
 
                 # Format start_datetime
-                if isinstance(start_datetime, datetime):
-                    start_datetime = start_datetime.strftime('%Y-%m-%d %H:%M:%S')
+                start_datetime = _fmt(start_datetime)
 
                 writer.writerow([
                     record_name, subject_id, hadm_id, start_datetime, end_datetime,
@@ -147,7 +249,7 @@ def extract_records_metadata(data_dir, records, output_file):
                 ])
 
             except Exception as e:
-                print(f"\nError processing {record_name}: {e}")
+                logging.warning(f"Error processing {record_name}: {e}")
                 continue
 
     print(f"\n✓ waveform_records.csv created: {output_file}")
@@ -157,13 +259,15 @@ def main():
     """Main execution function."""
     args = parse_arguments()
 
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     # Verify data directory exists
     if not Path(args.data_dir).is_dir():
         print(f"Error: Data directory not found: {args.data_dir}")
         sys.exit(1)
 
     # Find all records
-    records = find_all_records(args.data_dir)
+    records = _cached_find_all_records(args.data_dir)
 
     if not records:
         print("Error: No records found in the data directory")